@@ -17,15 +17,17 @@
 """
 
 import logging
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 
 import requests
 
 from raider.config import Config
 from raider.operations import Operation
-from raider.plugins import Plugin
+from raider.plugins import Html, Plugin, Regex
 from raider.request import Request
+from raider.scanner import RegexBatch
 from raider.user import User
+from raider.utils import get_soup
 
 
 class Flow:
@@ -59,6 +61,14 @@ class Flow:
         A list of :class:`Plugin <raider.plugins.Plugin>` objects
         detailing the pieces of information to be extracted from the
         response. Those will be later available for other Flow objects.
+      preprocessors:
+        A list of functions run on the response before extracting the
+        outputs, so that work shared by several of them is done only
+        once. When at least two :class:`Regex <raider.plugins.Regex>`
+        outputs can be scanned together, a :class:`RegexBatch
+        <raider.scanner.RegexBatch>` scans the response for them, and
+        when there are at least two :class:`Html <raider.plugins.Html>`
+        outputs, the HTML is parsed once for all of them.
       operations:
         A list of :class:`Operation <raider.operations.Operation>`
         objects to be executed after the response is received and
@@ -100,6 +110,19 @@ class Flow:
         self.outputs = outputs
         self.operations = operations
 
+        self.preprocessors: List[
+            Callable[[requests.models.Response], Any]
+        ] = []
+        if outputs:
+            regexes = [item for item in outputs if isinstance(item, Regex)]
+            regex_batch = RegexBatch(regexes)
+            if len(regex_batch.plugins) > 1:
+                self.preprocessors.append(regex_batch.scan)
+
+            htmls = [item for item in outputs if isinstance(item, Html)]
+            if len(htmls) > 1:
+                self.preprocessors.append(get_soup)
+
         self.request = request
         self.response: requests.models.Response = None
 
@@ -130,6 +153,10 @@ class Flow:
         respective :class:`Plugin <raider.plugins.Plugin>` object.
 
         """
+        if self.response is not None:
+            for preprocess in self.preprocessors:
+                preprocess(self.response)
+
         if self.outputs:
             for output in self.outputs:
                 if output.needs_response:
@@ -147,8 +174,9 @@ class Flow:
         """
         flow_inputs = self.request.list_inputs()
         if flow_inputs:
+            userdata = user.to_dict()
             for plugin in flow_inputs.values():
-                plugin.get_value(user.to_dict())
+                plugin.get_value(userdata)
 
     def run_operations(self) -> Optional[str]:
         """Runs the defined :class:`operations <raider.operations.Operation>`.
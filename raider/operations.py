@@ -25,6 +25,7 @@ from typing import Any, Callable, List, Optional, Union
 import requests
 
 from raider.plugins import Plugin
+from raider.utils import get_text
 
 
 def execute_actions(
@@ -306,7 +307,7 @@ class Grep(Operation):
 
     def match_response(self, response: requests.models.Response) -> bool:
         """Checks if the response body contains the defined regex."""
-        return bool(re.search(self.regex, response.text))
+        return bool(re.search(self.regex, get_text(response)))
 
     def __str__(self) -> str:
         """Returns a string representation of the Operation."""
@@ -387,7 +388,7 @@ class Save(Operation):
 
         with open(self.filename, mode) as outfile:
             if isinstance(content, requests.models.Response):
-                outfile.write(content.text)
+                outfile.write(get_text(content))
             elif isinstance(content, Plugin):
                 outfile.write(content.value)
             else:
@@ -499,7 +500,7 @@ class Print(Operation):
         """Classmethod to print the HTTP response body."""
         operation = cls(
             function=lambda response: print(
-                "\nHTTP response body:\n" + response.text
+                "\nHTTP response body:\n" + get_text(response)
             ),
             flags=Operation.NEEDS_RESPONSE,
         )
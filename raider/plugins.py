@@ -18,19 +18,30 @@
 
 import json
 import logging
-import os
 import re
+import sys
 from base64 import b64encode
-from typing import Callable, Dict, List, Optional, Union
+from copy import deepcopy
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import hy
 import requests
-from bs4 import BeautifulSoup
 
-from raider.utils import hy_dict_to_python, match_tag, parse_json_filter
-
-
-class Plugin:
+from raider.utils import (
+    compile_json_getter,
+    find_html_tag,
+    get_json_field,
+    get_soup,
+    get_text,
+    html_strainer,
+    hy_dict_to_python,
+    json_path_accessors,
+    run_shell_command,
+)
+
+
+# The flags are plain booleans, checked for every plugin and request.
+class Plugin:  # pylint: disable=too-many-instance-attributes
     """Parent class for all plugins.
 
     Each Plugin class inherits from here. "get_value" function should
@@ -54,6 +65,13 @@ class Plugin:
         value from the user's data, which will be sent to the function
         defined here. If NEEDS_RESPONSE is set, the Plugin will extract
         its value from the HTTP response instead.
+      needs_userdata:
+        A boolean which is True if the NEEDS_USERDATA flag is set.
+      needs_response:
+        A boolean which is True if the NEEDS_RESPONSE flag is set.
+      depends_on_other_plugins:
+        A boolean which is True if the DEPENDS_ON_OTHER_PLUGINS flag is
+        set.
 
     """
 
@@ -91,10 +109,13 @@ class Plugin:
             its value from the HTTP response instead.
 
         """
-        self.name = name
+        # Interned, since the name is looked up in the userdata on
+        # every request.
+        self.name = sys.intern(str(name))
         self.plugins: List["Plugin"] = []
         self.value: Optional[str] = value
         self.flags = flags
+        self._source: Optional["Plugin"] = None
 
         self.function: Callable[..., Optional[str]]
 
@@ -169,6 +190,34 @@ class Plugin:
             self.value = data[self.name]
         return self.value
 
+    def get_source_value(self) -> Optional[str]:
+        """Returns the value of the plugin this one was created from.
+
+        Used by plugins created out of another plugin, for example with
+        :meth:`Cookie.from_plugin <raider.plugins.Cookie.from_plugin>`.
+        Returns None if there's no such plugin or it has no value.
+
+        """
+        if self._source and self._source.value:
+            return self._source.value
+        return None
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Plugin":
+        """Copies the Plugin, without copying the one it was created from.
+
+        Templates and attacks copy the requests and Flows, but the copies
+        should still get the value of the original plugin, which is
+        updated when its own Flow runs.
+
+        """
+        copied = self.__class__.__new__(self.__class__)
+        memo[id(self)] = copied
+        copied.__dict__.update(
+            (key, value if key == "_source" else deepcopy(value, memo))
+            for key, value in self.__dict__.items()
+        )
+        return copied
+
     def return_value(self) -> Optional[str]:
         """Just return plugin's value.
 
@@ -178,19 +227,20 @@ class Plugin:
         return self.value
 
     @property
-    def needs_userdata(self) -> bool:
-        """Returns True if the NEEDS_USERDATA flag is set."""
-        return bool(self.flags & self.NEEDS_USERDATA)
-
-    @property
-    def needs_response(self) -> bool:
-        """Returns True if the NEEDS_RESPONSE flag is set."""
-        return bool(self.flags & self.NEEDS_RESPONSE)
-
-    @property
-    def depends_on_other_plugins(self) -> bool:
-        """Returns True if the DEPENDS_ON_OTHER_PLUGINS flag is set."""
-        return bool(self.flags & self.DEPENDS_ON_OTHER_PLUGINS)
+    def flags(self) -> int:
+        """Returns the flags of the Plugin."""
+        return self._flags
+
+    @flags.setter
+    def flags(self, flags: int) -> None:
+        """Sets the flags, and the booleans telling which ones are set."""
+        # pylint: disable=attribute-defined-outside-init
+        self._flags = flags
+        self.needs_userdata = bool(flags & self.NEEDS_USERDATA)
+        self.needs_response = bool(flags & self.NEEDS_RESPONSE)
+        self.depends_on_other_plugins = bool(
+            flags & self.DEPENDS_ON_OTHER_PLUGINS
+        )
 
 
 class Regex(Plugin):
@@ -216,6 +266,9 @@ class Regex(Plugin):
         A string containing the regular expression to be matched.
       extract:
         An integer with the group number that needs to be extracted.
+      offset:
+        An integer with where the next search starts, set by
+        :class:`RegexBatch <raider.scanner.RegexBatch>` for one search.
     """
 
     def __init__(self, name: str, regex: str, extract: int = 0) -> None:
@@ -242,6 +295,8 @@ class Regex(Plugin):
         )
         self.regex = regex
         self.extract = extract
+        self._pattern = re.compile(regex)
+        self.offset = 0
 
     def extract_regex(
         self, response: requests.models.Response
@@ -250,7 +305,9 @@ class Regex(Plugin):
 
         Given a text to be searched for matches, return the string
         inside the group defined in "extract" or the first group if it's
-        undefined.
+        undefined. If a :class:`RegexBatch <raider.scanner.RegexBatch>`
+        already scanned the response, the search starts from the offset
+        of the first match it found.
 
         Args:
           text:
@@ -261,7 +318,11 @@ class Regex(Plugin):
           if there are no matches.
 
         """
-        matches = re.search(self.regex, response.text)
+        text = get_text(response)
+        offset, self.offset = self.offset, 0
+        matches = self._pattern.search(text, offset)
+        if not matches and offset:
+            matches = self._pattern.search(text)
         if matches:
             groups = matches.groups()
             self.value = groups[self.extract]
@@ -281,9 +342,10 @@ class Regex(Plugin):
 class Html(Plugin):
     """Plugin to extract something from an HTML tag.
 
-    This Plugin will find the HTML "tag" containing the specified
+    This Plugin will find the first HTML "tag" containing the specified
     "attributes" and store the "extract" attribute of the matched tag
-    in its "value" attribute.
+    in its "value" attribute. The tags after the first match aren't
+    inspected.
 
     Attributes:
       tag:
@@ -333,15 +395,21 @@ class Html(Plugin):
         self.tag = tag
         self.attributes = hy_dict_to_python(attributes)
         self.extract = extract
+        patterns = {
+            key: re.compile(value) for key, value in self.attributes.items()
+        }
+        self._strainer = html_strainer(tag, patterns)
+        self._attr_items = list(patterns.items())
 
     def extract_html_tag(
         self, response: requests.models.Response
     ) -> Optional[str]:
         """Extract data from an HTML tag.
 
-        Given the HTML text, parses it, iterates through the tags, and
-        find the one matching the attributes. Then it stores the matched
-        "value" and returns it.
+        Given the HTML text, finds the first tag matching the "tag" and
+        the attributes. If the response wasn't already parsed, only the
+        matching tags are parsed. Then it stores the matched "value" and
+        returns it.
 
         Args:
           text:
@@ -352,12 +420,10 @@ class Html(Plugin):
           if there are no matches.
 
         """
-        soup = BeautifulSoup(response.text, "html.parser")
-        matches = soup.find_all(self.tag)
-
-        for item in matches:
-            if match_tag(item, self.attributes):
-                self.value = item.attrs.get(self.extract)
+        soup = get_soup(response, self._strainer)
+        item = find_html_tag(soup, self.tag, self._attr_items)
+        if item:
+            self.value = item.attrs.get(self.extract)
 
         logging.debug("Html filter %s: %s", self.name, str(self.value))
         return self.value
@@ -431,12 +497,14 @@ class Json(Plugin):
             )
 
         self.extract = extract
+        self._accessors = json_path_accessors(extract)
+        self._getter = compile_json_getter(self._accessors)
 
     def extract_json_from_response(
         self, response: requests.models.Response
     ) -> Optional[str]:
         """Extracts the json field from a HTTP response."""
-        return self.extract_json_field(response.text)
+        return self.extract_json_field(get_text(response))
 
     def extract_json_field(self, text: str) -> Optional[str]:
         """Extracts the JSON field from the text.
@@ -453,44 +521,11 @@ class Json(Plugin):
           found None will be returned.
 
         """
-        data = json.loads(text)
-
-        json_filter = parse_json_filter(self.extract)
-        is_valid = True
-        temp = data
-        for item in json_filter:
-            if item.startswith("["):
-                index = int(item.strip("[]"))
-                if len(temp) > index:
-                    temp = temp[index]
-                else:
-                    logging.warning(
-                        (
-                            "JSON array index doesn't exist.",
-                            "Cannot extract plugin's value.",
-                        )
-                    )
-                    is_valid = False
-                    break
-            else:
-                if item in temp:
-                    temp = temp[item]
-                else:
-                    logging.warning(
-                        (
-                            "Key '%s' not found in the response body.",
-                            "Cannot extract plugin's value.",
-                        ),
-                        item,
-                    )
-                    is_valid = False
-                    break
-
-        if is_valid:
-            self.value = str(temp)
+        self.value = get_json_field(
+            json.loads(text), self._accessors, self._getter
+        )
+        if self.value is not None:
             logging.debug("Json filter %s: %s", self.name, str(self.value))
-        else:
-            self.value = None
 
         return self.value
 
@@ -531,10 +566,14 @@ class Variable(Plugin):
         """
         super().__init__(
             name=name,
-            function=lambda data: data[self.name],
+            function=self.extract_variable,
             flags=Plugin.NEEDS_USERDATA,
         )
 
+    def extract_variable(self, data: Dict[str, str]) -> str:
+        """Returns the variable with the Plugin's name from userdata."""
+        return data[self.name]
+
 
 class Command(Plugin):
     """Runs a shell command and extract the output."""
@@ -542,9 +581,10 @@ class Command(Plugin):
     def __init__(self, name: str, command: str) -> None:
         """Initializes the Command Plugin.
 
-        The specified command will be executed with os.popen() and the
-        output with the stripped last newline, will be saved inside the
-        value.
+        The specified command will be executed in the shell with
+        subprocess.run() and the output with the stripped last newline,
+        will be saved inside the value. The errors are not captured, so
+        they're shown to the user.
 
         Args:
           name:
@@ -575,8 +615,7 @@ class Command(Plugin):
           variable has been defined.
 
         """
-        self.value = os.popen(self.command).read().strip()
-
+        self.value = run_shell_command(self.command)
         return self.value
 
 
@@ -656,7 +695,7 @@ class Cookie(Plugin):
             else:
                 super().__init__(
                     name=name,
-                    function=lambda: self.value,
+                    function=self.return_value,
                     value=value,
                     flags=flags,
                 )
@@ -693,12 +732,9 @@ class Cookie(Plugin):
           A Cookie object with the name and the plugin's value.
 
         """
-        cookie = cls(
-            name=name,
-            value=plugin.value,
-            function=lambda: plugin.value if plugin.value else None,
-            flags=0,
-        )
+        cookie = cls(name=name, value=plugin.value, flags=0)
+        cookie._source = plugin
+        cookie.function = cookie.get_source_value
         return cookie
 
 
@@ -708,6 +744,10 @@ class Header(Plugin):
     Use this Plugin when dealing with the headers in the HTTP request.
     """
 
+    # Only set for bearer authentication headers.
+    _last_token: Optional[str]
+    _bearer: Optional[str]
+
     def __init__(
         self,
         name: str,
@@ -745,7 +785,7 @@ class Header(Plugin):
             else:
                 super().__init__(
                     name=name,
-                    function=lambda: self.value,
+                    function=self.return_value,
                     value=value,
                     flags=flags,
                 )
@@ -761,6 +801,18 @@ class Header(Plugin):
         """Returns the header with the specified name from the response."""
         return response.headers.get(self.name)
 
+    def get_bearer_value(self) -> Optional[str]:
+        """Returns the bearer authentication string for the token.
+
+        The string is only built again when the token changes.
+
+        """
+        token = self.get_source_value()
+        if token != self._last_token:
+            self._last_token = token
+            self._bearer = "Bearer " + token if token else None
+        return self._bearer
+
     def __str__(self) -> str:
         """Returns a string representation of the Plugin."""
         return str({self.name: self.value})
@@ -782,8 +834,8 @@ class Header(Plugin):
           A Header object with the encoded basic authentication string.
 
         """
-        encoded = b64encode(":".join([username, password]).encode("utf-8"))
-        header = cls("Authorization", "Basic " + encoded.decode("utf-8"))
+        encoded = b64encode(f"{username}:{password}".encode("utf-8"))
+        header = cls("Authorization", "Basic " + encoded.decode("ascii"))
         return header
 
     @classmethod
@@ -802,14 +854,11 @@ class Header(Plugin):
           A Header object with the proper bearer authentication string.
 
         """
-        header = cls(
-            name="Authorization",
-            value=None,
-            flags=0,
-            function=lambda: "Bearer " + access_token.value
-            if access_token.value
-            else None,
-        )
+        header = cls(name="Authorization", value=None, flags=0)
+        header._source = access_token
+        header._last_token = None
+        header._bearer = None
+        header.function = header.get_bearer_value
         return header
 
     @classmethod
@@ -829,12 +878,9 @@ class Header(Plugin):
           A Header object with the name and the plugin's value.
 
         """
-        header = cls(
-            name=name,
-            value=None,
-            function=lambda: plugin.value if plugin.value else None,
-            flags=0,
-        )
+        header = cls(name=name, value=None, flags=0)
+        header._source = plugin
+        header.function = header.get_source_value
         return header
 
 
@@ -914,7 +960,7 @@ class Combine(Plugin):
     def __init__(self, *args: Union[str, Plugin]):
         """Initialize Combine object."""
         self.args = args
-        name = str(sum(hash(item) for item in args))
+        name = f"combine_{id(self):x}"
         super().__init__(
             name=name,
             flags=Plugin.DEPENDS_ON_OTHER_PLUGINS,
@@ -932,13 +978,13 @@ class Combine(Plugin):
         both strings and plugins.
 
         """
-        combined = ""
+        parts = []
         for item in self.args:
             if isinstance(item, str):
-                combined += item
+                parts.append(item)
             elif item.value:
-                combined += item.value
-        return combined
+                parts.append(item.value)
+        return "".join(parts)
 
 
 class Empty(Plugin):
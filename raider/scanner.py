@@ -0,0 +1,216 @@
+# Copyright (C) 2021 DigeeX
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Scanning responses for several Regex plugins at once.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+from raider.plugins import Regex
+from raider.utils import get_text
+
+try:
+    import hyperscan
+
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+
+# Escapes meaning the same for Python and hyperscan. Escaped letters and
+# digits have their own meaning, which only matches for "\n", "\r" and
+# "\t".
+ESCAPE = r"\\(?:[^0-9A-Za-z]|[nrt])"
+
+# The regular expression syntax read the same way by Python and
+# hyperscan: escapes, character sets, groups, repetitions, and other
+# characters matching themselves.
+COMPATIBLE_TOKEN = re.compile(
+    "|".join(
+        (
+            ESCAPE,
+            r"\[\^?\]?(?:[^\\\[\]]|" + ESCAPE + r")*\]",
+            r"\((?:\?:|(?!\?))",
+            r"(?:[*+?]|\{\d+(?:,\d*)?\})\??(?![*+?{])",
+            r"[^\\\[\]{}(*+?$]",
+        )
+    )
+)
+
+
+def hyperscan_compatible(regex: str) -> bool:
+    """Tells if hyperscan and Python read the regular expression alike.
+
+    Hyperscan is only used to find where the first match starts, which
+    is safe only if it matches exactly the same strings as Python's
+    :mod:`re`. That's the case for the syntax accepted here: literal
+    characters, punctuation escapes, character sets, groups,
+    alternatives and repetitions. Everything else is rejected, since its
+    meaning differs: ``\\s``, ``\\w``, ``\\d`` and ``\\b`` use other
+    character classes, and backreferences, inline flags, lookarounds,
+    possessive repetitions, POSIX classes, ``{,n}`` and ``$`` aren't
+    supported or work differently.
+
+    Args:
+      regex:
+        A string with the regular expression to check.
+
+    Returns:
+      True if the regular expression can be scanned with hyperscan.
+
+    """
+    position = 0
+    while position < len(regex):
+        token = COMPATIBLE_TOKEN.match(regex, position)
+        if not token:
+            return False
+        position = token.end()
+    return True
+
+
+@lru_cache()
+def hyperscan_database(expressions: Tuple[str, ...]) -> Any:
+    """Compiles the regular expressions into a hyperscan database.
+
+    The databases are cached here instead of being stored in the
+    RegexBatch objects, since they can't be copied, and Flows get
+    deep-copied when fuzzing.
+
+    Args:
+      expressions:
+        A tuple with the regular expressions to compile.
+
+    Returns:
+      A hyperscan.Database object, or None if hyperscan isn't installed
+      or can't compile the expressions.
+
+    """
+    if not HYPERSCAN_AVAILABLE or not expressions:
+        return None
+
+    flags = hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_UTF8
+    database = hyperscan.Database()
+    try:
+        database.compile(
+            expressions=[item.encode("utf-8") for item in expressions],
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[flags] * len(expressions),
+        )
+    except hyperscan.error as err:
+        logging.debug("Cannot use hyperscan for Regex: %s", err)
+        return None
+    return database
+
+
+class RegexBatch:
+    """Scans a response once for several Regex plugins.
+
+    When hyperscan is available, the regular expressions are compiled
+    into a single database, and the response body is scanned only once
+    instead of once for every plugin. Hyperscan doesn't support
+    capturing groups, so it's only used to find where the first match of
+    each regex starts. The :class:`Regex <raider.plugins.Regex>` plugins
+    will then extract the groups starting from that offset, and search
+    the whole text when hyperscan found nothing.
+
+    Only the plugins whose regular expressions are read the same way by
+    hyperscan and Python, as told by :func:`hyperscan_compatible`, and
+    can be compiled by hyperscan on their own are scanned. The others
+    search the response on their own, so that one unsupported regex
+    doesn't stop the batch.
+
+    Attributes:
+      plugins:
+        A list with the :class:`Regex <raider.plugins.Regex>` plugins
+        scanned by this object.
+      expressions:
+        A tuple with the plugins' regular expressions.
+
+    """
+
+    def __init__(self, plugins: List[Regex]) -> None:
+        """Initializes the RegexBatch object.
+
+        Args:
+          plugins:
+            A list of Regex plugins to be scanned together.
+
+        """
+        self.plugins = [
+            plugin
+            for plugin in plugins
+            if hyperscan_compatible(plugin.regex)
+            and hyperscan_database((plugin.regex,))
+        ]
+        self.expressions = tuple(plugin.regex for plugin in self.plugins)
+
+    @property
+    def database(self) -> Any:
+        """Returns the hyperscan database, or None if not available."""
+        return hyperscan_database(self.expressions)
+
+    def scan(self, response: requests.models.Response) -> None:
+        """Scans the response and sets the offsets in the plugins.
+
+        Args:
+          response:
+            An requests.models.Response object with the HTTP response.
+
+        """
+        database = self.database
+        if not database:
+            return
+
+        text = get_text(response)
+        try:
+            data = text.encode("utf-8")
+        except UnicodeEncodeError:
+            # Hyperscan needs valid UTF-8, which lone surrogates aren't.
+            return
+        offsets: Dict[int, int] = {}
+
+        def on_match(
+            index: int, start: int, end: int, flags: int, context: None
+        ) -> None:
+            """Keeps the leftmost start of each matched regex."""
+            # pylint: disable=unused-argument
+            if index not in offsets or start < offsets[index]:
+                offsets[index] = start
+
+        database.scan(data, match_event_handler=on_match)
+
+        # Hyperscan reports byte offsets. Unless the text is ASCII, they
+        # are converted to character offsets in a single pass, decoding
+        # only the bytes between two consecutive offsets.
+        if text.isascii():
+            positions = {offset: offset for offset in offsets.values()}
+        else:
+            positions = {}
+            last_offset = 0
+            characters = 0
+            for offset in sorted(set(offsets.values())):
+                characters += len(data[last_offset:offset].decode("utf-8"))
+                positions[offset] = characters
+                last_offset = offset
+
+        for index, plugin in enumerate(self.plugins):
+            if index in offsets:
+                plugin.offset = positions[offsets[index]]
@@ -17,6 +17,7 @@
 """
 
 
+import sys
 from typing import Dict, List
 
 import hy
@@ -183,14 +184,19 @@ class User:
             self.data.update({key: value})
 
     def to_dict(self) -> Dict[str, str]:
-        """Returns this object's data in a dictionary format."""
+        """Returns this object's data in a dictionary format.
+
+        The keys are interned, so that they are quickly found by the
+        plugins looking them up by their name.
+
+        """
         data = {}
         data["username"] = self.username
         data["password"] = self.password
         data.update(self.cookies.to_dict())
         data.update(self.headers.to_dict())
         data.update(self.data.to_dict())
-        return data
+        return {sys.intern(str(key)): value for key, value in data.items()}
 
 
 class UserStore(DataStore):
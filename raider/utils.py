@@ -19,14 +19,35 @@
 import logging
 import os
 import re
+import subprocess
 import sys
-from typing import Any, Dict, List, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 import bs4
 import hy
+import requests
+from bs4.builder import builder_registry
 
 from raider.__version__ import __version__
 
+# bs4 only registers the lxml parser if lxml.etree can be imported, so
+# a broken lxml installation falls back to html.parser too.
+if builder_registry.lookup("lxml"):
+    HTML_PARSER = "lxml"
+else:
+    HTML_PARSER = "html.parser"
+
 
 def default_user_agent() -> str:
     """Gets the default user agent.
@@ -384,32 +405,227 @@ def list_projects() -> List[str]:
     return projects
 
 
-def match_tag(html_tag: bs4.element.Tag, attributes: Dict[str, str]) -> bool:
+def match_tag(
+    html_tag: bs4.element.Tag,
+    attributes: Union[
+        Dict[str, Union[str, Pattern[str]]],
+        Sequence[Tuple[str, Union[str, Pattern[str]]]],
+    ],
+) -> bool:
     """Tells if a tag matches the search.
 
     This function checks whether the supplied tag matches the
     attributes. The attributes is a dictionary, and the values are
     treated as a regular expression, to allow checking for tags that
-    don't have a static value.
+    don't have a static value. The values can also be already compiled
+    regular expressions, which avoids compiling them on every call.
+    Attributes with multiple values, like "class", are matched as one
+    string with the values separated by spaces. When checking many tags,
+    the attributes can be given as a list of (key, value) pairs instead,
+    to avoid going through the dictionary for every tag.
 
     Args:
       html_tag:
         A bs4.element.Tag object with the tag to be checked.
       attributes:
-        A dictionary of attributes to check whether they match with the tag.
+        A dictionary, or a list of (key, value) pairs, of attributes to
+        check whether they match with the tag.
 
     Returns:
       A boolean saying whether the tag matched with the attributes or not.
 
     """
-    for key, value in attributes.items():
-        if not (key in html_tag.attrs) or not (
-            re.match(value, html_tag.attrs[key])
-        ):
+    pairs = attributes.items() if isinstance(attributes, dict) else attributes
+    tag_attrs = html_tag.attrs
+    for key, value in pairs:
+        attr = tag_attrs.get(key)
+        if attr is None:
+            return False
+        if isinstance(attr, list):
+            attr = " ".join(attr)
+        if isinstance(value, str):
+            value = re.compile(value)
+        if not value.match(attr):
             return False
     return True
 
 
+def attribute_matcher(
+    pattern: Pattern[str]
+) -> Callable[[Optional[str]], bool]:
+    """Creates a function telling if an attribute value matches.
+
+    Used with bs4.element.SoupStrainer, which would search() a compiled
+    pattern instead of matching it at the start of the value.
+
+    Args:
+      pattern:
+        A compiled regular expression to match the attribute value.
+
+    Returns:
+      A function which given the value of the attribute, or None if the
+      tag doesn't have it, returns True if the pattern matches it.
+
+    """
+
+    def matches(value: Optional[str]) -> bool:
+        """Returns True if the pattern matches the attribute value."""
+        return value is not None and bool(pattern.match(value))
+
+    return matches
+
+
+def html_strainer(
+    tag: str, patterns: Dict[str, Pattern[str]]
+) -> bs4.element.SoupStrainer:
+    """Creates a strainer parsing only the tags that can match.
+
+    bs4 would search() compiled patterns, so the strainer gets functions
+    matching them at the start instead, like match_tag() does.
+
+    Args:
+      tag:
+        A string with the name of the HTML tag.
+      patterns:
+        A dictionary with the attributes of the tag, and the compiled
+        regular expressions their values should match.
+
+    Returns:
+      A bs4.element.SoupStrainer object to be used with get_soup().
+
+    """
+    matchers = {
+        key: attribute_matcher(pattern) for key, pattern in patterns.items()
+    }
+    return bs4.element.SoupStrainer(
+        tag, attrs=cast(Dict[str, Any], matchers)
+    )
+
+
+def find_html_tag(
+    soup: bs4.BeautifulSoup,
+    tag: str,
+    attributes: Sequence[Tuple[str, Pattern[str]]],
+) -> Optional[bs4.element.Tag]:
+    """Finds the first HTML tag matching the name and the attributes.
+
+    find_all() would collect all the tags with that name first, so the
+    tree is walked lazily to stop at the first match.
+
+    Args:
+      soup:
+        A bs4.BeautifulSoup object with the parsed HTML.
+      tag:
+        A string with the name of the HTML tag.
+      attributes:
+        A list of (key, value) pairs of attributes given to match_tag().
+
+    Returns:
+      The first bs4.element.Tag object matching, or None.
+
+    """
+    for item in soup.descendants:
+        if (
+            isinstance(item, bs4.element.Tag)
+            and item.name == tag
+            and match_tag(item, attributes)
+        ):
+            return item
+    return None
+
+
+def run_shell_command(command: str) -> str:
+    """Runs the command in the shell and returns its output.
+
+    The errors are not captured, so they're shown to the user, and a
+    warning is logged if the command fails.
+
+    Args:
+      command:
+        A string with the command to run.
+
+    Returns:
+      A string with the output of the command, without the last newline.
+
+    """
+    result = subprocess.run(
+        command,
+        shell=True,
+        stdout=subprocess.PIPE,
+        text=True,
+        check=False,
+    )
+    if result.returncode:
+        logging.warning(
+            "Command %s exited with status %d", command, result.returncode
+        )
+    return result.stdout.strip()
+
+
+def get_text(response: requests.models.Response) -> str:
+    """Gets the decoded body of the response.
+
+    requests decodes the body every time its "text" attribute is
+    accessed, and guesses the encoding with charset detection if it
+    couldn't get one from the headers. requests already uses ISO-8859-1
+    for "text/*" responses without a charset, so the detection only
+    happens when there's no encoding at all, for example without a
+    Content-Type header. To avoid it, UTF-8 is assumed in that case,
+    which also sets the response's "encoding" attribute. The decoded
+    text is cached inside the response object, so that multiple
+    plugins and operations can use it.
+
+    Args:
+      response:
+        A requests.models.Response object with the HTTP response.
+
+    Returns:
+      A string with the decoded response body.
+
+    """
+    text = getattr(response, "_raider_text", None)
+    if text is None:
+        if response.encoding is None:
+            response.encoding = "utf-8"
+        text = response.text
+        setattr(response, "_raider_text", text)
+    return text
+
+
+def get_soup(
+    response: requests.models.Response,
+    strainer: Optional[bs4.element.SoupStrainer] = None,
+) -> bs4.BeautifulSoup:
+    """Gets the parsed HTML from the response.
+
+    The whole HTML document is parsed only once, and the result is
+    cached inside the response object, so that multiple plugins can
+    search the same tree. If a strainer is supplied and the response
+    wasn't parsed already, only the tags matching the strainer are
+    parsed, and the result isn't cached.
+
+    Args:
+      response:
+        A requests.models.Response object with the HTML body.
+      strainer:
+        An optional bs4.SoupStrainer object defining which tags to
+        parse.
+
+    Returns:
+      A bs4.BeautifulSoup object with the parsed HTML.
+
+    """
+    soup = getattr(response, "_raider_soup", None)
+    if soup is None:
+        if strainer:
+            return bs4.BeautifulSoup(
+                get_text(response), HTML_PARSER, parse_only=strainer
+            )
+        soup = bs4.BeautifulSoup(get_text(response), HTML_PARSER)
+        setattr(response, "_raider_soup", soup)
+    return soup
+
+
 def parse_json_filter(raw: str) -> List[str]:
     """Parses a raw JSON filter and returns a list with the items.
 
@@ -466,3 +682,93 @@ def parse_json_filter(raw: str) -> List[str]:
         parsed_filter += parsed_item
 
     return parsed_filter
+
+
+def compile_json_getter(
+    accessors: List[Union[str, int]]
+) -> Callable[[Any], Any]:
+    """Creates a function returning the element at the JSON path.
+
+    Instead of walking the path in a loop for every JSON document, a
+    function subscripting the document directly is generated, for
+    example ``lambda data: data["env"]["production"][0]``.
+
+    Args:
+      accessors:
+        A list with the keys and the indices to follow, as strings
+        and integers respectively.
+
+    Returns:
+      A function which given the decoded JSON data, returns the element
+      found. The exceptions raised by subscripting aren't caught.
+
+    """
+    source = "lambda data: data" + "".join(
+        "[" + repr(item) + "]" for item in accessors
+    )
+    # pylint: disable=eval-used
+    return eval(source, {"__builtins__": {}})
+
+
+def json_path_accessors(raw: str) -> List[Union[str, int]]:
+    """Returns the keys and the indices of a raw JSON filter.
+
+    Args:
+      raw:
+        A string with the JSON filter, as given to parse_json_filter().
+
+    Returns:
+      A list with the keys as strings and the array indices as integers.
+
+    """
+    return [
+        int(item.strip("[]")) if item.startswith("[") else item
+        for item in parse_json_filter(raw)
+    ]
+
+
+def get_json_field(
+    data: Any,
+    accessors: List[Union[str, int]],
+    getter: Callable[[Any], Any],
+) -> Optional[str]:
+    """Gets the field at the JSON path from the decoded data.
+
+    If the getter fails, the path is walked again to log which key or
+    index is missing.
+
+    Args:
+      data:
+        The decoded JSON data.
+      accessors:
+        A list with the keys and the indices of the path.
+      getter:
+        The function created by compile_json_getter() for the path.
+
+    Returns:
+      A string with the field found, or None if it doesn't exist.
+
+    """
+    try:
+        return str(getter(data))
+    except (IndexError, KeyError, TypeError):
+        pass
+
+    for item in accessors:
+        try:
+            data = data[item]
+        except (IndexError, KeyError, TypeError):
+            if isinstance(item, int):
+                logging.warning(
+                    "JSON array index %d doesn't exist. "
+                    "Cannot extract plugin's value.",
+                    item,
+                )
+            else:
+                logging.warning(
+                    "Key '%s' not found in the response body. "
+                    "Cannot extract plugin's value.",
+                    item,
+                )
+            break
+    return None
@@ -0,0 +1,44 @@
+from copy import deepcopy
+
+from raider.plugins import Cookie, Header, Regex
+from raider.request import Template
+
+
+def get_input_values(request):
+    inputs = request.list_inputs()
+    return {name: plugin.get_value({}) for name, plugin in inputs.items()}
+
+
+def test_template_copies_read_source_plugin():
+    token = Regex(name="token", regex='"token":"([^"]+)"')
+    template = Template(
+        "GET",
+        url="https://example.com",
+        headers=[Header.bearerauth(token)],
+        cookies=[Cookie.from_plugin(token, "sess")],
+    )
+    request = template()
+
+    token.value = "abc"
+
+    assert get_input_values(request) == {
+        "sess": "abc",
+        "authorization": "Bearer abc",
+    }
+
+
+def test_deepcopy_keeps_source_plugin_shared():
+    token = Regex(name="token", regex='"token":"([^"]+)"')
+    header = Header.from_plugin(token, "X-Token")
+    bearer = Header.bearerauth(token)
+    cookie = Cookie.from_plugin(token, "sess")
+    header_copy, bearer_copy, cookie_copy = deepcopy([header, bearer, cookie])
+
+    token.value = "abc"
+    assert header_copy.get_value({}) == "abc"
+    assert bearer_copy.get_value({}) == "Bearer abc"
+    assert cookie_copy.get_value({}) == "abc"
+
+    token.value = "def"
+    assert bearer_copy.get_value({}) == "Bearer def"
+    assert cookie_copy.get_value({}) == "def"
@@ -0,0 +1,78 @@
+import pytest
+import requests
+
+from raider.plugins import Regex
+from raider.scanner import (
+    HYPERSCAN_AVAILABLE,
+    RegexBatch,
+    hyperscan_compatible,
+)
+
+
+def make_response(body):
+    response = requests.models.Response()
+    response._content = body.encode("utf-8")
+    response.encoding = "utf-8"
+    return response
+
+
+@pytest.mark.parametrize(
+    "regex",
+    [
+        r'"accessToken":"([^"]+)"',
+        r'name="csrf" value="([a-f0-9]{32})"',
+        r"(?:id|key)=([^&]*)",
+        r"[]a](b)",
+    ],
+)
+def test_hyperscan_compatible(regex):
+    assert hyperscan_compatible(regex)
+
+
+@pytest.mark.parametrize(
+    "regex",
+    [
+        r"a\sb=(\d)",
+        r"\btoken=(.+)",
+        r"(a)\1",
+        r"a{,3}(b)",
+        r"(?i)token=(.+)",
+        r"[[:alpha:]]+",
+        r"token=(.+)$",
+        r"a++(b)",
+    ],
+)
+def test_hyperscan_incompatible(regex):
+    assert not hyperscan_compatible(regex)
+
+
+def test_batch_keeps_earliest_match():
+    plugins = [
+        Regex(name="first", regex=r"a\sb=(\d)"),
+        Regex(name="second", regex=r"c=([0-9])"),
+        Regex(name="third", regex=r"a{,3}(b)"),
+    ]
+    response = make_response("a\x1cb=1 a b=2 c=3 aab")
+    RegexBatch(plugins).scan(response)
+
+    values = [plugin.extract_regex(response) for plugin in plugins]
+
+    assert values == ["1", "3", "b"]
+
+
+@pytest.mark.skipif(not HYPERSCAN_AVAILABLE, reason="needs hyperscan")
+def test_batch_sets_character_offsets():
+    plugins = [
+        Regex(name="first", regex=r"c=([0-9])"),
+        Regex(name="second", regex=r"é=(.)"),
+        Regex(name="unsupported", regex=r"\bt=(.)"),
+    ]
+    batch = RegexBatch(plugins)
+    assert batch.plugins == plugins[:2]
+
+    response = make_response("ñ c=3 é=4 t=5")
+    batch.scan(response)
+    assert [plugin.offset for plugin in plugins] == [2, 6, 0]
+
+    values = [plugin.extract_regex(response) for plugin in plugins]
+    assert values == ["3", "4", "5"]